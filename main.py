@@ -2,29 +2,56 @@ import json
 import os
 import time
 import requests
-import xml.etree.ElementTree as ET
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import csv
+import gzip
+import hashlib
+import io
+import sqlite3
+import threading
+from functools import lru_cache
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from lxml import etree
 from datetime import datetime, timedelta, timezone
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
+from googleapiclient.http import MediaIoBaseUpload
 from linebot import LineBotApi, WebhookHandler
+from linebot.http_client import RequestsHttpClient, RequestsHttpResponse
 from linebot.models import TextSendMessage, MessageEvent, TextMessage
-from linebot.exceptions import InvalidSignatureError
+from linebot.exceptions import InvalidSignatureError, LineBotApiError
 from dotenv import load_dotenv
 from flask import Flask, request, abort
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
-from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException, WebDriverException
 
 load_dotenv()
 
 LINE_CHANNEL_ACCESS_TOKEN = os.getenv("LINE_CHANNEL_ACCESS_TOKEN")
 LINE_CHANNEL_SECRET = os.getenv("LINE_CHANNEL_SECRET")
 FOLDER_ID = os.getenv("FOLDER_ID")
+DRIVE_FOLDER_SHARED = os.getenv("DRIVE_FOLDER_SHARED") == "1"  # โฟลเดอร์แชร์ "ทุกคนที่มีลิงก์" ไว้แล้ว
 WEATHER_TRIGGER_KEY = os.getenv("WEATHER_TRIGGER_KEY") 
+CSV_GZIP = os.getenv("CSV_GZIP") == "1"  # อัปโหลดเป็น .csv.gz เพื่อลดขนาดไฟล์
 SCOPES = ['https://www.googleapis.com/auth/drive.file']
 REGISTERED_USER_FILE = "registered_users.txt"
+REGISTERED_USER_DB = "registered_users.db"
+MULTICAST_LIMIT = 500
+PUSH_WORKERS = 32
+JOB_WORKERS = 2
+WEATHER_CACHE_TTL = 60
+PRIORITY_FIELDS = ('WmoStationNumber', 'Observation_Rainfall', 'Observation_Rainfall_Unit')
+BANGKOK_TZ = timezone(timedelta(hours=7))
+CSV_FILENAME_FORMAT = "weather_%Y-%m-%d_%H-%M-%S.csv"
+TMD_WEATHER_URL = "https://data.tmd.go.th/api/WeatherToday/V2/?uid=api&ukey=api12345"
+TMD_REQUEST_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36",
+    "Accept": "application/xml,text/xml;q=0.9,*/*;q=0.8",
+}
 
 SERVICE_ACCOUNT_INFO = os.getenv("GOOGLE_SERVICE_ACCOUNT_JSON")
 if SERVICE_ACCOUNT_INFO is None:
@@ -33,36 +60,117 @@ if SERVICE_ACCOUNT_INFO is None:
 credentials = service_account.Credentials.from_service_account_info(
     json.loads(SERVICE_ACCOUNT_INFO), scopes=SCOPES)
 
-line_bot_api = LineBotApi(LINE_CHANNEL_ACCESS_TOKEN)
+drive_service = build('drive', 'v3', credentials=credentials, static_discovery=True)
+drive_lock = threading.Lock()  # httplib2 ภายใน drive_service ไม่ thread-safe
+
+SESSION = requests.Session()
+SESSION.headers['Accept-Encoding'] = 'gzip'
+SESSION.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=PUSH_WORKERS,
+                                      max_retries=Retry(total=3, backoff_factor=0.2)))
+
+class SessionHttpClient(RequestsHttpClient):
+    # ให้ line-bot-sdk ใช้ connection pool เดียวกับ SESSION แทน requests.get/post ที่เปิด connection ใหม่ทุกครั้ง
+    def get(self, url, headers=None, params=None, stream=False, timeout=None):
+        if timeout is None:
+            timeout = self.timeout
+        return RequestsHttpResponse(SESSION.get(url, headers=headers, params=params, stream=stream, timeout=timeout))
+
+    def post(self, url, headers=None, data=None, timeout=None):
+        if timeout is None:
+            timeout = self.timeout
+        return RequestsHttpResponse(SESSION.post(url, headers=headers, data=data, timeout=timeout))
+
+    def delete(self, url, headers=None, data=None, timeout=None):
+        if timeout is None:
+            timeout = self.timeout
+        return RequestsHttpResponse(SESSION.delete(url, headers=headers, data=data, timeout=timeout))
+
+    def put(self, url, headers=None, data=None, timeout=None):
+        if timeout is None:
+            timeout = self.timeout
+        return RequestsHttpResponse(SESSION.put(url, headers=headers, data=data, timeout=timeout))
+
+line_bot_api = LineBotApi(LINE_CHANNEL_ACCESS_TOKEN, http_client=SessionHttpClient)
 handler = WebhookHandler(LINE_CHANNEL_SECRET)
 
 app = Flask(__name__)
 
+push_executor = ThreadPoolExecutor(max_workers=PUSH_WORKERS)
+job_queue = queue.Queue()
+weather_cache = {"ts": 0, "digest": None, "stations": None}
+weather_cache_lock = threading.Lock()
+tmd_response_cache = {"etag": None, "content": None}
+last_upload = {"digest": None, "url": None}
+last_upload_lock = threading.Lock()
+weather_update_lock = threading.Lock()
+
+def _open_user_db():
+    db = sqlite3.connect(REGISTERED_USER_DB, check_same_thread=False, isolation_level=None)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("CREATE TABLE IF NOT EXISTS users (user_id TEXT PRIMARY KEY)")
+    # ย้ายผู้ใช้จากไฟล์ข้อความเดิมเข้าฐานข้อมูลครั้งเดียว
+    # rename เป็นชื่อเฉพาะของ process ก่อน เพื่อให้มีเพียง worker เดียวที่ได้ไฟล์ไป
+    claimed_file = f"{REGISTERED_USER_FILE}.{os.getpid()}"
+    try:
+        os.replace(REGISTERED_USER_FILE, claimed_file)
+    except FileNotFoundError:
+        return db  # ไม่มีไฟล์เดิม หรือ worker อื่นย้ายไปแล้ว
+    with open(claimed_file, "r", encoding="utf-8") as f:
+        db.executemany("INSERT OR IGNORE INTO users VALUES (?)",
+                       [(line.strip(),) for line in f if line.strip()])
+    os.replace(claimed_file, f"{REGISTERED_USER_FILE}.migrated")
+    return db
+
+user_db = _open_user_db()
+user_db_lock = threading.Lock()
+registered_users_cache = {"data_version": None, "users": None}
+
 def get_registered_users():
-    if not os.path.exists(REGISTERED_USER_FILE):
-        return []
-    with open(REGISTERED_USER_FILE, "r", encoding="utf-8") as f:
-        return [line.strip() for line in f if line.strip()]
+    with user_db_lock:
+        # data_version เปลี่ยนเมื่อ process อื่น (gunicorn worker อื่น) แก้ไขฐานข้อมูล
+        data_version = user_db.execute("PRAGMA data_version").fetchone()[0]
+        if registered_users_cache["users"] is None or registered_users_cache["data_version"] != data_version:
+            users = [row[0] for row in user_db.execute("SELECT user_id FROM users")]
+            registered_users_cache.update(data_version=data_version, users=users)
+        return list(registered_users_cache["users"])
 
 def register_user(user_id):
-    users = get_registered_users()
-    if user_id not in users:
-        with open(REGISTERED_USER_FILE, "a", encoding="utf-8") as f:
-            f.write(f"{user_id}\n")
+    with user_db_lock:
+        inserted = user_db.execute("INSERT OR IGNORE INTO users VALUES (?)", (user_id,)).rowcount
+        if inserted:
+            registered_users_cache["users"] = None
+    if inserted:
         print(f"User {user_id} registered.")
     else:
         print(f"User {user_id} already registered.")
 
 def unregister_user(user_id):
-    users = get_registered_users()
-    if user_id in users:
-        users.remove(user_id)
-        with open(REGISTERED_USER_FILE, "w", encoding="utf-8") as f:
-            f.writelines(f"{uid}\n" for uid in users)
+    with user_db_lock:
+        deleted = user_db.execute("DELETE FROM users WHERE user_id = ?", (user_id,)).rowcount
+        if deleted:
+            registered_users_cache["users"] = None
+    if deleted:
         print(f"User {user_id} unregistered.")
 
+def fetch_weather_data_direct():
+    headers = TMD_REQUEST_HEADERS
+    if tmd_response_cache["etag"]:
+        headers = {**headers, "If-None-Match": tmd_response_cache["etag"]}
+    try:
+        response = SESSION.get(TMD_WEATHER_URL, headers=headers, timeout=(3, 15))
+        response.raise_for_status()
+    except requests.RequestException as e:
+        print(f"Direct fetch error: {e}")
+        return None
+    if response.status_code == 304:
+        return tmd_response_cache["content"]
+    if b"<Station" in response.content:
+        tmd_response_cache.update(etag=response.headers.get("ETag"), content=response.content)
+        return response.content
+    print("Direct fetch: ไม่พบ XML จาก TMD")
+    return None
+
 def fetch_weather_data_with_retry(retries=3, wait_seconds=3):
-    url = "https://data.tmd.go.th/api/WeatherToday/V2/?uid=api&ukey=api12345"
     for attempt in range(retries):
         try:
             options = Options()
@@ -72,17 +180,18 @@ def fetch_weather_data_with_retry(retries=3, wait_seconds=3):
             options.add_argument("--disable-dev-shm-usage")
 
             driver = webdriver.Chrome(options=options)
-            driver.set_page_load_timeout(60)
-            driver.get(url)
-            time.sleep(30)  # ให้เวลา JS โหลด
-
-            page_source = driver.page_source
-            driver.quit()
-
-            if "<Station" in page_source:
-                return page_source.encode("utf-8")  # กลับเป็น bytes เพื่อใช้ต่อใน ET.fromstring
-            else:
-                print(f"Attempt {attempt+1}: ไม่พบ XML จาก TMD")
+            try:
+                driver.set_page_load_timeout(60)
+                driver.get(TMD_WEATHER_URL)
+                # รอจนกว่า XML จะโหลดเสร็จ (สูงสุด 30 วินาที) แทนการรอครบ 30 วินาทีทุกครั้ง
+                try:
+                    WebDriverWait(driver, 30, poll_frequency=1).until(lambda d: "<Station" in d.page_source)
+                except TimeoutException:
+                    print(f"Attempt {attempt+1}: ไม่พบ XML จาก TMD")
+                else:
+                    return driver.page_source.encode("utf-8")  # กลับเป็น bytes เพื่อใช้ต่อใน etree.iterparse
+            finally:
+                driver.quit()
         except WebDriverException as e:
             print(f"Attempt {attempt+1}: Selenium error: {e}")
         if attempt < retries - 1:
@@ -91,89 +200,187 @@ def fetch_weather_data_with_retry(retries=3, wait_seconds=3):
     raise Exception("Failed to fetch weather data after retries")
 
 def fetch_weather_data():
-    return fetch_weather_data_with_retry()
+    return fetch_weather_data_direct() or fetch_weather_data_with_retry()
 
 def extract_all_fields(elem, prefix=""):
     data = {}
-    for child in elem:
-        tag = child.tag
-        key_prefix = f"{prefix}{tag}" if prefix == "" else f"{prefix}_{tag}"
-        for attr_key, attr_val in child.attrib.items():
-            data[f"{key_prefix}_{attr_key}"] = attr_val
-        if child.text and child.text.strip():
-            data[key_prefix] = child.text.strip()
-        data.update(extract_all_fields(child, key_prefix))
+    stack = [(elem, prefix)]
+    while stack:
+        node, key_prefix = stack.pop()
+        if node is not elem:
+            for attr_key, attr_val in node.attrib.items():
+                data[f"{key_prefix}_{attr_key}"] = attr_val
+            text = node.text
+            if text and (text := text.strip()):
+                data[key_prefix] = text
+        children = [(child, f"{key_prefix}_{child.tag}" if key_prefix else child.tag)
+                    for child in node.iterchildren(etree.Element)]
+        stack.extend(reversed(children))  # pop ตามลำดับ pre-order เหมือนแบบ recursive เดิม เผื่อมี key ซ้ำ
     return data
 
-def parse_and_save_csv(xml_data, filename):
+def iter_stations(xml_data):
+    for _, station in etree.iterparse(io.BytesIO(xml_data), events=("end",), tag="Station",
+                                      remove_comments=True, remove_pis=True,
+                                      resolve_entities='internal'):
+        yield extract_all_fields(station)
+        station.clear()
+        while station.getprevious() is not None:
+            del station.getparent()[0]
+
+def get_weather_snapshot(ttl=WEATHER_CACHE_TTL):
+    with weather_cache_lock:
+        now = time.monotonic()
+        if weather_cache["stations"] is None or now - weather_cache["ts"] > ttl:
+            xml_data = fetch_weather_data()
+            digest = hashlib.blake2b(xml_data, digest_size=16).hexdigest()
+            if digest != weather_cache["digest"]:
+                try:
+                    stations = list(iter_stations(xml_data))
+                except Exception as e:
+                    raise Exception(f"Error parsing XML data: {e}")
+                weather_cache.update(digest=digest, stations=stations)
+            weather_cache["ts"] = now
+        return weather_cache["digest"], weather_cache["stations"]
+
+def get_weather_stations(ttl=WEATHER_CACHE_TTL):
+    return get_weather_snapshot(ttl)[1]
+
+@lru_cache(maxsize=8)
+def csv_columns(all_fields):
+    remaining_fields = sorted(f for f in all_fields if f not in PRIORITY_FIELDS)
+    fieldnames = PRIORITY_FIELDS + tuple(remaining_fields)
+    return fieldnames, {field: i for i, field in enumerate(fieldnames)}
+
+def stations_to_csv(stations):
+    all_fields = set()
+    for station_data in stations:
+        all_fields.update(station_data)
+    fieldnames, col = csv_columns(frozenset(all_fields))
+
+    rows = []
+    for station_data in stations:
+        row = [None] * len(fieldnames)
+        for field, value in station_data.items():
+            row[col[field]] = value
+        rows.append(row)
+
+    buf = io.BytesIO()
+    csvfile = io.TextIOWrapper(buf, encoding='utf-8', newline='')
+    writer = csv.writer(csvfile)
+    writer.writerow(fieldnames)
+    writer.writerows(rows)
+    csvfile.detach()
+    buf.seek(0)
+    return buf
+
+def upload_to_drive(csv_buffer, filename):
+    mimetype = 'text/csv'
+    if CSV_GZIP:
+        csv_buffer = io.BytesIO(gzip.compress(csv_buffer.getvalue(), compresslevel=6))
+        filename += '.gz'
+        mimetype = 'application/gzip'
+    file_metadata = {'name': filename, 'parents': [FOLDER_ID]}
+    media = MediaIoBaseUpload(csv_buffer, mimetype=mimetype, resumable=False)
+    with drive_lock:
+        file = drive_service.files().create(body=file_metadata, media_body=media, fields='id').execute()
+        file_id = file.get('id')
+        if not DRIVE_FOLDER_SHARED:
+            drive_service.permissions().create(fileId=file_id, body={"type": "anyone", "role": "reader"}).execute()
+    return f"https://drive.google.com/file/d/{file_id}/view?usp=sharing"
+
+def upload_weather_csv(filename):
+    digest, stations = get_weather_snapshot()
+    with last_upload_lock:
+        # ข้อมูล TMD ยังไม่เปลี่ยน ใช้ลิงก์ไฟล์เดิมแทนการอัปโหลดซ้ำ
+        if digest != last_upload["digest"]:
+            url = upload_to_drive(stations_to_csv(stations), filename)
+            last_upload.update(digest=digest, url=url)
+        return last_upload["url"]
+
+def _chunks(items, size):
+    return (items[i:i + size] for i in range(0, len(items), size))
+
+def push_message_to_user(user_id, message):
     try:
-        root = ET.fromstring(xml_data)
-        stations = root.findall(".//Station")
-        all_fields = set()
-        rows = []
-        for station in stations:
-            station_data = extract_all_fields(station)
-            all_fields.update(station_data.keys())
-            rows.append(station_data)
-
-        priority_fields = ['WmoStationNumber', 'Observation_Rainfall', 'Observation_Rainfall_Unit']
-        remaining_fields = sorted(f for f in all_fields if f not in priority_fields)
-        fieldnames = priority_fields + remaining_fields
-
-        with open(filename, mode='w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            for row in rows:
-                writer.writerow(row)
+        line_bot_api.push_message(user_id, TextSendMessage(text=message))
     except Exception as e:
-        raise Exception(f"Error parsing XML data: {e}")
-
-def upload_to_drive(filename):
-    service = build('drive', 'v3', credentials=credentials)
-    file_metadata = {'name': os.path.basename(filename), 'parents': [FOLDER_ID]}
-    media = MediaFileUpload(filename, mimetype='text/csv')
-    file = service.files().create(body=file_metadata, media_body=media, fields='id').execute()
-    file_id = file.get('id')
-    service.permissions().create(fileId=file_id, body={"type": "anyone", "role": "reader"}).execute()
-    return f"https://drive.google.com/file/d/{file_id}/view?usp=sharing"
+        print(f"Error sending message to {user_id}: {e}")
+
+def push_to_users(user_ids, message):
+    list(push_executor.map(lambda user_id: push_message_to_user(user_id, message), user_ids))
 
 def send_to_registered_users(message):
     user_ids = get_registered_users()
     if not user_ids:
         print("⚠️ No registered users.")
-    for user_id in user_ids:
+    for chunk in _chunks(user_ids, MULTICAST_LIMIT):
         try:
-            line_bot_api.push_message(user_id, TextSendMessage(text=message))
+            line_bot_api.multicast(chunk, TextSendMessage(text=message))
+        except LineBotApiError as e:
+            # 400 = LINE ปฏิเสธทั้ง batch (เช่น user ID ผิดรูปแบบ) จึงส่งทีละคนได้โดยไม่ซ้ำ
+            if e.status_code == 400:
+                print(f"Multicast to {len(chunk)} users rejected, falling back to push: {e}")
+                push_to_users(chunk, message)
+            else:
+                print(f"Error sending multicast to {len(chunk)} users ({e.status_code}): {e}")
         except Exception as e:
-            print(f"Error sending message to {user_id}: {e}")
+            # เช่น timeout ระหว่างรอ response: LINE อาจรับ multicast ไปแล้ว จึงไม่ส่งซ้ำ
+            print(f"Error sending multicast to {len(chunk)} users: {e}")
 
 def count_stations_in_weather_data():
     try:
-        xml_data = fetch_weather_data()
-        root = ET.fromstring(xml_data)
-        stations = root.findall(".//Station")
-        return len(stations)
+        return len(get_weather_stations())
     except Exception as e:
         print(f"Error counting stations: {e}")
         return None
 
 def send_daily_weather_update():
-    print("✅ Running scheduled weather update...")
-    bangkok_tz = timezone(timedelta(hours=7))
-    now = datetime.now(bangkok_tz)
-    timestamp = now.strftime("%Y-%m-%d_%H-%M-%S")
-    filename = f"weather_{timestamp}.csv"
+    if not weather_update_lock.acquire(blocking=False):
+        print("⚠️ Weather update already running, skipping.")
+        return
     try:
-        xml_data = fetch_weather_data()
-        parse_and_save_csv(xml_data, filename)
-        file_url = upload_to_drive(filename)
-        message = f"🌤️ อัปเดตสภาพอากาศประจำวันที่ {now.strftime('%d/%m/%Y')} ครับ\n📂 ดาวน์โหลดไฟล์: {file_url}"
-    except Exception as e:
-        message = f"❌ ข้อผิดพลาดในการอัปเดตสภาพอากาศ: {e}"
+        print("✅ Running scheduled weather update...")
+        now = datetime.now(BANGKOK_TZ)
+        filename = now.strftime(CSV_FILENAME_FORMAT)
+        try:
+            file_url = upload_weather_csv(filename)
+            message = f"🌤️ อัปเดตสภาพอากาศประจำวันที่ {now.strftime('%d/%m/%Y')} ครับ\n📂 ดาวน์โหลดไฟล์: {file_url}"
+        except Exception as e:
+            message = f"❌ ข้อผิดพลาดในการอัปเดตสภาพอากาศ: {e}"
+        send_to_registered_users(message)
     finally:
-        if os.path.exists(filename):
-            os.remove(filename)
-    send_to_registered_users(message)
+        weather_update_lock.release()
+
+def push_station_count(user_id):
+    count = count_stations_in_weather_data()
+    reply = f"📡 ขณะนี้มีข้อมูลจากทั้งหมด {count} สถานีครับ" if count else "เกิดข้อผิดพลาดในการดึงข้อมูลสถานี 😢"
+    push_message_to_user(user_id, reply)
+
+def push_weather_csv(user_id):
+    now = datetime.now(BANGKOK_TZ)
+    filename = now.strftime(CSV_FILENAME_FORMAT)
+    try:
+        file_url = upload_weather_csv(filename)
+        reply = f"✅ ดึงข้อมูลเรียบร้อยแล้ว!\n📂 ดาวน์โหลดไฟล์ CSV ได้ที่: {file_url}"
+    except Exception as e:
+        reply = f"❌ เกิดข้อผิดพลาดในการดึงข้อมูล: {e}"
+    push_message_to_user(user_id, reply)
+
+def _job_worker():
+    while True:
+        func, args = job_queue.get()
+        try:
+            func(*args)
+        except Exception as e:
+            print(f"Error in background job {func.__name__}: {e}")
+        finally:
+            job_queue.task_done()
+
+def enqueue_job(func, *args):
+    job_queue.put((func, args))
+
+for _ in range(JOB_WORKERS):
+    threading.Thread(target=_job_worker, daemon=True).start()
 
 @handler.add(MessageEvent, message=TextMessage)
 def handle_message(event):
@@ -187,25 +394,11 @@ def handle_message(event):
         unregister_user(user_id)
         line_bot_api.reply_message(event.reply_token, TextSendMessage(text="คุณได้ยกเลิกการรับบริการแล้ว 😢"))
     elif text == 'เช็คข้อมูล':
-        count = count_stations_in_weather_data()
-        reply = f"📡 ขณะนี้มีข้อมูลจากทั้งหมด {count} สถานีครับ" if count else "เกิดข้อผิดพลาดในการดึงข้อมูลสถานี 😢"
-        line_bot_api.reply_message(event.reply_token, TextSendMessage(text=reply))
+        line_bot_api.reply_message(event.reply_token, TextSendMessage(text="⏳ กำลังตรวจสอบข้อมูลสถานี..."))
+        enqueue_job(push_station_count, user_id)
     elif text == 'ดึงข้อมูล':
-        bangkok_tz = timezone(timedelta(hours=7))
-        now = datetime.now(bangkok_tz)
-        timestamp = now.strftime("%Y-%m-%d_%H-%M-%S")
-        filename = f"weather_{timestamp}.csv"
-        try:
-            xml_data = fetch_weather_data()
-            parse_and_save_csv(xml_data, filename)
-            file_url = upload_to_drive(filename)
-            reply = f"✅ ดึงข้อมูลเรียบร้อยแล้ว!\n📂 ดาวน์โหลดไฟล์ CSV ได้ที่: {file_url}"
-        except Exception as e:
-            reply = f"❌ เกิดข้อผิดพลาดในการดึงข้อมูล: {e}"
-        finally:
-            if os.path.exists(filename):
-                os.remove(filename)
-        line_bot_api.reply_message(event.reply_token, TextSendMessage(text=reply))
+        line_bot_api.reply_message(event.reply_token, TextSendMessage(text="⏳ กำลังดึงข้อมูล กรุณารอสักครู่..."))
+        enqueue_job(push_weather_csv, user_id)
     else:
         line_bot_api.reply_message(event.reply_token, TextSendMessage(
             text="กรุณาพิมพ์คำสั่งที่ถูกต้อง เช่น 'สมัครรับบริการ', 'ยกเลิกสมัคร', 'เช็คข้อมูล', หรือ 'ดึงข้อมูล'"
@@ -230,8 +423,8 @@ def callback():
 def trigger_weather():
     if request.args.get("key") != WEATHER_TRIGGER_KEY:
         return "❌ Unauthorized", 403
-    send_daily_weather_update()
-    return "✅ Triggered weather update"
+    enqueue_job(send_daily_weather_update)
+    return "✅ Queued weather update", 202
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))